@@ -1,14 +1,17 @@
 """Command-line interface for the collage generator."""
 
 import argparse
+import shlex
 import sys
 from pathlib import Path
 
 from .image_ops import (
+    OUTPUT_EXTENSIONS,
     apply_image_sampling,
     determine_common_aspect_ratio,
     determine_output_path,
     get_image_files,
+    get_save_options,
 )
 from .layout import (
     calculate_grid_layout,
@@ -17,10 +20,22 @@ from .layout import (
 from .rendering import apply_sample_label, apply_title_to_collage
 
 
-def parse_arguments():
+def positive_int(value):
+    """Argparse type for integers of at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def parse_arguments(argv=None):
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(
-        description='Create a grid collage from images in a folder.'
+        description='Create a grid collage from images in a folder.',
+        epilog="Use 'mkcollage batch MANIFEST' to create several collages in one run."
     )
     parser.add_argument(
         'folder',
@@ -70,6 +85,12 @@ def parse_arguments():
         default=None,
         help='Maximum number of rows. If there are too many images to fit, a sample will be created that always includes the first and last images. A "Sample N of M" label will be shown in the top-right corner.'
     )
+    parser.add_argument(
+        '--workers',
+        type=positive_int,
+        default=None,
+        help='Number of images to decode and resize in parallel (default: number of CPUs)'
+    )
     parser.add_argument(
         '--background',
         type=str,
@@ -80,7 +101,13 @@ def parse_arguments():
         '--quality',
         type=int,
         default=80,
-        help='JPEG quality (1-100, default: 80)'
+        help='JPEG/WebP quality (1-100, default: 80)'
+    )
+    parser.add_argument(
+        '--format',
+        choices=sorted(OUTPUT_EXTENSIONS),
+        default='jpeg',
+        help='Output format used when the output filename has no extension (default: jpeg). WebP is smaller but slower to encode.'
     )
     parser.add_argument(
         '--title',
@@ -124,13 +151,90 @@ def parse_arguments():
         help='Reserve space at the top for the title instead of drawing over the collage'
     )
     
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
-def main():
-    """Main entry point for the collage CLI."""
-    args = parse_arguments()
+def parse_batch_arguments(argv):
+    """Parse command line arguments for the batch subcommand."""
+    parser = argparse.ArgumentParser(
+        prog='mkcollage batch',
+        description='Create several collages in one process from a manifest file.'
+    )
+    parser.add_argument(
+        'manifest',
+        type=str,
+        help='Manifest with one collage per line: folder, output and options separated by tabs. '
+             'Output and options are optional; blank lines and lines starting with # are ignored.'
+    )
+    
+    return parser.parse_args(argv)
+
+
+def read_manifest(manifest_path):
+    """
+    Read a batch manifest into per-collage argument lists.
     
+    Args:
+        manifest_path: Path to the manifest file
+        
+    Returns:
+        list: (line_number, argv) tuples, argv suitable for parse_arguments
+    """
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    except OSError as e:
+        print(f"Error: Cannot read manifest '{manifest_path}': {e}")
+        sys.exit(1)
+    
+    jobs = []
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        
+        fields = [field.strip() for field in line.split('\t')]
+        argv = [fields[0]]
+        if len(fields) > 1 and fields[1]:
+            argv.append(fields[1])
+        if len(fields) > 2:
+            argv.extend(shlex.split(fields[2]))
+        jobs.append((line_number, argv))
+    
+    return jobs
+
+
+def run_batch(manifest_path):
+    """
+    Create every collage listed in a manifest within this process.
+    
+    A failing entry is reported and skipped; the exit status is non-zero
+    if any entry failed.
+    """
+    jobs = read_manifest(manifest_path)
+    failed = []
+    
+    for job_number, (line_number, argv) in enumerate(jobs, start=1):
+        print(f"[{job_number}/{len(jobs)}] {argv[0]}")
+        try:
+            run_one(parse_arguments(argv))
+        except SystemExit as e:
+            # Errors in the single-collage path exit; keep going with the rest
+            if e.code:
+                failed.append(line_number)
+        except Exception as e:
+            print(f"Error: manifest line {line_number} failed: {e}")
+            failed.append(line_number)
+        print()
+    
+    if failed:
+        print(f"Error: {len(failed)} of {len(jobs)} collages failed (manifest lines: {', '.join(map(str, failed))})")
+        sys.exit(1)
+    
+    print(f"Created {len(jobs)} collages")
+
+
+def run_one(args):
+    """Create a single collage from parsed command line arguments."""
     # Get image files from folder
     image_files = get_image_files(args.folder)
     
@@ -146,7 +250,7 @@ def main():
     )
     
     # Determine output path
-    output_file = determine_output_path(args.output, args.folder)
+    output_file = determine_output_path(args.output, args.folder, args.format)
     
     # Determine the most common aspect ratio
     width_ratio, height_ratio, aspect_ratio = determine_common_aspect_ratio(image_files)
@@ -167,7 +271,7 @@ def main():
     collage = create_collage_canvas(
         image_files, layout, args.background,
         args.title, args.title_margin, args.title_size,
-        args.title_font, args.title_border
+        args.title_font, args.title_border, args.workers
     )
     
     # Apply title text
@@ -186,10 +290,21 @@ def main():
     # Save the collage
     print("Saving collage...")
     Path(output_file).parent.mkdir(parents=True, exist_ok=True)
-    collage.save(output_file, quality=args.quality, optimize=True)
+    collage.save(output_file, **get_save_options(output_file, args.quality))
     
     print(f"Collage saved to: {output_file}")
 
 
+def main(argv=None):
+    """Main entry point for the collage CLI."""
+    if argv is None:
+        argv = sys.argv[1:]
+    
+    if argv and argv[0] == 'batch':
+        run_batch(parse_batch_arguments(argv[1:]).manifest)
+    else:
+        run_one(parse_arguments(argv))
+
+
 if __name__ == "__main__":
     main()
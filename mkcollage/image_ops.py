@@ -1,12 +1,19 @@
 """Image operations and analysis utilities."""
 
+import bisect
+import os
 import random
+import struct
 import sys
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 from PIL import Image
 
+# Resampling filter used when fitting images into grid cells
+_RESAMPLE = Image.Resampling.LANCZOS
+
 
 def get_image_files(folder_path):
     """Get all image files from the specified folder."""
@@ -21,16 +28,117 @@ def get_image_files(folder_path):
         print(f"Error: '{folder_path}' is not a directory.")
         sys.exit(1)
     
-    image_files = []
-    for file in sorted(folder.iterdir()):
-        if file.is_file() and file.suffix.lower() in image_extensions:
-            image_files.append(str(file))
+    # scandir's cached entry types avoid a stat() per file on most platforms
+    entries = []
+    with os.scandir(folder) as it:
+        for entry in it:
+            if (os.path.splitext(entry.name)[1].lower() in image_extensions
+                    and entry.is_file()):
+                entries.append((entry.name, entry.path))
     
-    return image_files
+    entries.sort()
+    return [path for _, path in entries]
+
+
+# Number of images sampled when determining the common aspect ratio
+ASPECT_RATIO_SAMPLE_SIZE = 20
+
+# Common aspect ratios mapped to their simple width:height form
+_COMMON_RATIOS = {
+    1.33: (4, 3),
+    1.78: (16, 9),
+    1.77: (16, 9),
+    1.60: (16, 10),
+    1.50: (3, 2),
+    1.00: (1, 1),
+    0.75: (3, 4),
+    0.67: (2, 3),
+    0.56: (9, 16),
+}
+_COMMON_RATIO_KEYS = tuple(sorted(_COMMON_RATIOS))
+
+# JPEG start-of-frame markers (SOF0-SOF15, minus DHT, JPG and DAC)
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# JPEG markers that carry no length field
+_JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xD8)) | {0x01}
+
+
+def _read_jpeg_size(f):
+    """Walk JPEG markers up to the first SOFn segment and return its size."""
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        # Skip fill bytes
+        while code == 0xFF:
+            byte = f.read(1)
+            if not byte:
+                return None
+            code = byte[0]
+        if code in _JPEG_STANDALONE_MARKERS:
+            continue
+        if code in (0xD9, 0xDA):
+            # End of image or start of scan before any frame header
+            return None
+        length, = struct.unpack('>H', f.read(2))
+        if code in _JPEG_SOF_MARKERS:
+            height, width = struct.unpack('>xHH', f.read(5))
+            return width, height
+        f.seek(length - 2, 1)
+
+
+def _read_image_size(img_path):
+    """
+    Read image dimensions directly from the file header.
+    
+    Only the first few bytes are read (a short marker walk for JPEG), which
+    is much cheaper than constructing a PIL image.
+    
+    Returns:
+        tuple: (width, height), or None if the header is not recognized
+    """
+    with open(img_path, 'rb') as f:
+        head = f.read(32)
+        if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+            return struct.unpack('>II', head[16:24])
+        if head[:6] in (b'GIF87a', b'GIF89a'):
+            return struct.unpack('<HH', head[6:10])
+        if head.startswith(b'BM') and len(head) >= 26:
+            dib_size, = struct.unpack('<I', head[14:18])
+            if dib_size == 12:
+                return struct.unpack('<HH', head[18:22])
+            width, height = struct.unpack('<ii', head[18:26])
+            # Negative height marks a top-down bitmap
+            return width, abs(height)
+        if head.startswith(b'RIFF') and head[8:12] == b'WEBP' and len(head) >= 30:
+            chunk = head[12:16]
+            if chunk == b'VP8 ':
+                width, height = struct.unpack('<HH', head[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+            if chunk == b'VP8L':
+                bits = int.from_bytes(head[21:25], 'little')
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b'VP8X':
+                return (int.from_bytes(head[24:27], 'little') + 1,
+                        int.from_bytes(head[27:30], 'little') + 1)
+            return None
+        if head.startswith(b'\xff\xd8'):
+            return _read_jpeg_size(f)
+    return None
 
 
 def get_aspect_ratio(img_path):
     """Get the aspect ratio of an image."""
+    try:
+        size = _read_image_size(img_path)
+    except (OSError, struct.error):
+        size = None
+    if size is not None and size[0] > 0 and size[1] > 0:
+        return size[0] / size[1]
+    
+    # Fall back to Pillow for formats or headers the fast path doesn't handle
     try:
         with Image.open(img_path) as img:
             return img.width / img.height
@@ -42,14 +150,14 @@ def get_aspect_ratio(img_path):
 def determine_common_aspect_ratio(image_files):
     """
     Determine the most common aspect ratio from a list of images.
-    Samples 20 images randomly for efficiency.
+    Samples ASPECT_RATIO_SAMPLE_SIZE images randomly for efficiency.
     
     Returns:
         tuple: (width_ratio, height_ratio, actual_ratio_float)
     """
     # Sample images for aspect ratio analysis
     total_images = len(image_files)
-    sample_size = 20
+    sample_size = ASPECT_RATIO_SAMPLE_SIZE
     
     if total_images > sample_size:
         sampled_files = random.sample(image_files, sample_size)
@@ -58,26 +166,35 @@ def determine_common_aspect_ratio(image_files):
         sampled_files = image_files
         print(f"Analyzing aspect ratio from all {total_images} images...")
     
-    aspect_ratios = []
+    # Read headers concurrently to overlap disk latency
+    total = len(sampled_files)
+    ratios = [None] * total
     
-    for idx, img_path in enumerate(sampled_files):
-        # Show progress
-        progress = idx + 1
-        total = len(sampled_files)
-        sys.stdout.write(f"\rAnalyzing images: {progress}/{total} ({100 * progress // total}%)")
-        sys.stdout.flush()
-        
-        ratio = get_aspect_ratio(img_path)
-        if ratio is None:
-            print(f"\nWarning: Skipping '{img_path}' - not a valid image file")
-            continue
-        # Round to 2 decimal places to group similar ratios
-        aspect_ratios.append(round(ratio, 2))
+    with ThreadPoolExecutor(max_workers=max(1, min(16, total))) as executor:
+        futures = {
+            executor.submit(get_aspect_ratio, img_path): idx
+            for idx, img_path in enumerate(sampled_files)
+        }
+        for progress, future in enumerate(as_completed(futures), start=1):
+            # Show progress
+            sys.stdout.write(f"\rAnalyzing images: {progress}/{total} ({100 * progress // total}%)")
+            sys.stdout.flush()
+            ratios[futures[future]] = future.result()
     
     # Complete the progress line
     sys.stdout.write("\n")
     sys.stdout.flush()
     
+    # Collect in input order so ties in the most common ratio stay deterministic
+    aspect_ratios = []
+    for img_path, ratio in zip(sampled_files, ratios):
+        if ratio is None:
+            print(f"Warning: Skipping '{img_path}' - not a valid image file")
+            continue
+        # Bucket into hundredths to group similar ratios; integer keys
+        # count faster than floats and never split on representation error
+        aspect_ratios.append(round(ratio * 100))
+    
     # Check if we have any valid images
     if not aspect_ratios:
         print("Error: No valid images found in the folder.")
@@ -85,28 +202,18 @@ def determine_common_aspect_ratio(image_files):
     
     # Find most common aspect ratio
     counter = Counter(aspect_ratios)
-    most_common_ratio = counter.most_common(1)[0][0]
+    most_common_ratio = counter.most_common(1)[0][0] / 100
     
     print(f"Most common aspect ratio: {most_common_ratio:.2f}:1")
     
     # Convert to simple ratio (e.g., 16:9, 4:3, etc.)
-    # Common ratios
-    common_ratios = {
-        1.33: (4, 3),
-        1.78: (16, 9),
-        1.77: (16, 9),
-        1.60: (16, 10),
-        1.50: (3, 2),
-        1.00: (1, 1),
-        0.75: (3, 4),
-        0.67: (2, 3),
-        0.56: (9, 16),
-    }
-    
-    # Find closest common ratio
-    closest_ratio = min(common_ratios.keys(), key=lambda x: abs(x - most_common_ratio))
+    # Find closest common ratio; only the neighbours around the insertion
+    # point in the sorted keys can be closest (ties go to the larger one)
+    i = bisect.bisect_left(_COMMON_RATIO_KEYS, most_common_ratio)
+    candidates = _COMMON_RATIO_KEYS[max(0, i - 1):i + 1]
+    closest_ratio = min(reversed(candidates), key=lambda x: abs(x - most_common_ratio))
     if abs(closest_ratio - most_common_ratio) < 0.1:
-        width_ratio, height_ratio = common_ratios[closest_ratio]
+        width_ratio, height_ratio = _COMMON_RATIOS[closest_ratio]
         print(f"Using standard aspect ratio: {width_ratio}:{height_ratio}")
     else:
         # Use the actual ratio
@@ -116,11 +223,22 @@ def determine_common_aspect_ratio(image_files):
     return width_ratio, height_ratio, most_common_ratio
 
 
-def fit_image_preserve_aspect(img, cell_width, cell_height, background_color):
+def fit_image_to_cell(img, cell_width, cell_height):
     """
     Resize image to fit within cell while preserving aspect ratio.
-    Adds letterboxing/pillarboxing if needed.
+    
+    For best performance pass a freshly opened image: JPEG input is then
+    decoded at a reduced scale instead of at full resolution.
+    
+    Returns:
+        tuple: (resized_image, x_offset, y_offset) where the offsets center
+        the resized image within the cell
     """
+    # Let JPEG decode at 1/2, 1/4 or 1/8 scale (no-op for other formats or
+    # already loaded images), keeping 2x headroom for the LANCZOS resample.
+    # This updates img.width/img.height, so it must come first.
+    img.draft('RGB', (cell_width * 2, cell_height * 2))
+    
     # Calculate the scaling factor to fit the image in the cell
     img_ratio = img.width / img.height
     cell_ratio = cell_width / cell_height
@@ -134,18 +252,14 @@ def fit_image_preserve_aspect(img, cell_width, cell_height, background_color):
         new_height = cell_height
         new_width = int(cell_height * img_ratio)
     
-    # Resize the image
-    img_resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+    # Resize the image; for large downscales reducing_gap first box-reduces
+    # to within 2x of the target so LANCZOS runs on far fewer pixels
+    img_resized = img.resize((new_width, new_height), _RESAMPLE, reducing_gap=2.0)
     
-    # Create a new image with the cell size and background color
-    result = Image.new('RGB', (cell_width, cell_height), background_color)
-    
-    # Paste the resized image in the center
     x_offset = (cell_width - new_width) // 2
     y_offset = (cell_height - new_height) // 2
-    result.paste(img_resized, (x_offset, y_offset))
     
-    return result
+    return img_resized, x_offset, y_offset
 
 
 def sample_images(image_files, max_count):
@@ -174,12 +288,13 @@ def sample_images(image_files, max_count):
         remaining_slots = max_count - 2
         total_middle = len(image_files) - 2
         
-        # Use evenly spaced indices
+        # Use evenly spaced indices, +1 to skip first and centered within
+        # each step; the largest index is len - 1 - step / 2, so the last
+        # image is never picked here (we'll add it separately)
         step = total_middle / remaining_slots
-        for i in range(remaining_slots):
-            idx = int(1 + i * step + step / 2)  # +1 to skip first, center within step
-            if idx < len(image_files) - 1:  # Don't go to last (we'll add it separately)
-                sampled.append(image_files[idx])
+        sampled.extend(
+            image_files[int(1 + i * step + step / 2)] for i in range(remaining_slots)
+        )
     
     # Always include last
     sampled.append(image_files[-1])
@@ -215,21 +330,31 @@ def apply_image_sampling(image_files, columns, max_rows):
     return image_files, is_sampled, total_image_count
 
 
-def determine_output_path(output_arg, folder_path):
+# Default file extension for each --format choice
+OUTPUT_EXTENSIONS = {
+    'jpeg': '.jpg',
+    'webp': '.webp',
+}
+
+
+def determine_output_path(output_arg, folder_path, output_format='jpeg'):
     """
     Determine the output file path based on user input.
     
     Args:
         output_arg: Output argument from command line (can be None)
         folder_path: Path to the folder containing images
+        output_format: Format whose extension is used when none is given
         
     Returns:
         str: Full output file path
     """
+    extension = OUTPUT_EXTENSIONS[output_format]
+    
     if output_arg is None:
         # Use the last directory name from folder path as output filename
         folder_path = Path(folder_path).resolve()
-        output_name = folder_path.name + '.jpg'
+        output_name = folder_path.name + extension
         output_path = Path.cwd() / output_name
         print(f"No output specified, using: {output_path}")
     else:
@@ -237,9 +362,37 @@ def determine_output_path(output_arg, folder_path):
         # If output has no directory component, use current directory
         if output_path.parent == Path('.'):
             output_path = Path.cwd() / output_path.name
-        # Ensure .jpg extension if no extension provided
+        # Ensure an extension if none provided
         if not output_path.suffix:
-            output_path = output_path.with_suffix('.jpg')
+            output_path = output_path.with_suffix(extension)
     
     return str(output_path)
 
+
+def get_save_options(output_path, quality):
+    """
+    Build the Pillow save options for the output file.
+    
+    JPEG is saved baseline 4:2:0 with optimized Huffman tables;
+    progressive output was both slower to encode and larger for collages.
+    Restart markers every 64 MCUs add about 1% to the file and let other
+    tools decode it in parallel. WebP uses libwebp's method 4.
+    
+    Args:
+        output_path: Path of the output file
+        quality: Encoder quality (1-100)
+        
+    Returns:
+        dict: Keyword arguments for PIL.Image.save
+    """
+    suffix = Path(output_path).suffix.lower()
+    if suffix in ('.jpg', '.jpeg'):
+        return {
+            'quality': quality,
+            'optimize': True,
+            'subsampling': 2,
+            'restart_marker_blocks': 64,
+        }
+    if suffix == '.webp':
+        return {'quality': quality, 'method': 4}
+    return {'quality': quality, 'optimize': True}
@@ -1,12 +1,14 @@
 """Layout engine and canvas assembly."""
 
 import math
+import os
 import sys
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, replace
 
-from PIL import Image
+from PIL import Image, ImageColor
 
-from .image_ops import fit_image_preserve_aspect
+from .image_ops import fit_image_to_cell
 from .rendering import setup_canvas_with_title
 
 
@@ -20,8 +22,20 @@ class GridLayout:
     cell_width: int
     cell_height: int
     padding: int
+    # Position of the grid within the canvas, e.g. below reserved title space
     offset_x: int = 0
     offset_y: int = 0
+    
+    def cell_positions(self, count):
+        """Return the top-left (x, y) canvas position of the first count cells."""
+        stride_x = self.cell_width + self.padding
+        stride_y = self.cell_height + self.padding
+        base_x = self.padding + self.offset_x
+        base_y = self.padding + self.offset_y
+        return [
+            ((idx % self.cols) * stride_x + base_x, (idx // self.cols) * stride_y + base_y)
+            for idx in range(count)
+        ]
 
 
 def calculate_grid_layout(num_images, aspect_ratio, padding, 
@@ -57,7 +71,9 @@ def calculate_grid_layout(num_images, aspect_ratio, padding,
             rows = math.ceil(num_images / cols)
     else:
         # Auto-calculate grid dimensions
-        cols = math.ceil(math.sqrt(num_images))
+        # Integer ceil(sqrt(num_images))
+        root = math.isqrt(num_images)
+        cols = root if root * root == num_images else root + 1
         rows = math.ceil(num_images / cols)
     
     # Step 2: Calculate initial canvas dimensions
@@ -127,13 +143,6 @@ def calculate_grid_layout(num_images, aspect_ratio, padding,
     if not height:
         canvas_height = rows * cell_height + (rows + 1) * padding
     
-    # Step 5: Calculate offsets for centering (if auto-calculating layout)
-    offset_x, offset_y = 0, 0
-    if not columns and not width and not height:
-        # For auto-calculated layouts, we might want to center
-        # This is mainly for edge cases where canvas doesn't perfectly match grid
-        pass  # Currently not needed with exact calculations
-    
     print(f"Grid layout: {rows} rows × {cols} columns, cells: {cell_width}x{cell_height}px")
     
     return GridLayout(
@@ -143,13 +152,24 @@ def calculate_grid_layout(num_images, aspect_ratio, padding,
         rows=rows,
         cell_width=cell_width,
         cell_height=cell_height,
-        padding=padding,
-        offset_x=offset_x,
-        offset_y=offset_y
+        padding=padding
     )
 
 
-def grid_collage(images, collage, layout, background_color):
+def _render_cell(img_path, cell_width, cell_height):
+    """
+    Open an image and fit it into a grid cell.
+
+    Runs on a worker thread; Pillow releases the GIL while decoding and
+    resizing, so several cells can be rendered in parallel.
+    """
+    # Close the file as soon as the cell is rendered; the resized image
+    # returned by fit_image_to_cell does not depend on it
+    with Image.open(img_path) as img:
+        return fit_image_to_cell(img, cell_width, cell_height)
+
+
+def grid_collage(images, collage, layout, background_color, workers=None):
     """
     Create a grid-based collage using pre-calculated layout parameters.
 
@@ -158,33 +178,58 @@ def grid_collage(images, collage, layout, background_color):
         collage (PIL.Image): Blank canvas to place the images.
         layout (GridLayout): Pre-calculated grid layout parameters.
         background_color (str): Background color for letterboxing/pillarboxing.
+        workers (int): Number of worker threads (default: CPU count).
     """
-    # Process each image using pre-calculated layout values
-    for idx, img_path in enumerate(images):
-        # Show progress
-        progress = idx + 1
-        total = len(images)
-        sys.stdout.write(f"\rProcessing images: {progress}/{total} ({100 * progress // total}%)")
-        sys.stdout.flush()
+    total = len(images)
+    if isinstance(background_color, str):
+        background_color = ImageColor.getcolor(background_color, collage.mode)
+    positions = layout.cell_positions(total)
+    # Limit progress output to about 50 updates; a write and flush per image
+    # adds up for large collages, especially when stdout is a pipe
+    progress_step = max(1, total // 50)
+    
+    if workers is None:
+        workers = os.cpu_count()
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                _render_cell, img_path, layout.cell_width, layout.cell_height
+            ): (img_path, position)
+            for img_path, position in zip(images, positions)
+        }
         
+        # Paste on the main thread as cells finish; paste into the shared
+        # canvas is not thread-safe
         try:
-            img = Image.open(img_path)
-            
-            # Fit image preserving aspect ratio
-            fitted_img = fit_image_preserve_aspect(
-                img, layout.cell_width, layout.cell_height, background_color
-            )
-            
-            # Calculate position in the grid
-            col = idx % layout.cols
-            row = idx // layout.cols
-            x = col * (layout.cell_width + layout.padding) + layout.padding + layout.offset_x
-            y = row * (layout.cell_height + layout.padding) + layout.padding + layout.offset_y
-            
-            collage.paste(fitted_img, (x, y))
-        except Exception as e:
-            print(f"\nWarning: Skipping '{img_path}' - cannot open image: {e}")
-            continue
+            for progress, future in enumerate(as_completed(futures), start=1):
+                # Show progress
+                if progress == total or progress % progress_step == 0:
+                    sys.stdout.write(f"\rProcessing images: {progress}/{total} ({100 * progress // total}%)")
+                    sys.stdout.flush()
+                
+                # Drop our reference so each finished cell is freed once pasted
+                img_path, (x, y) = futures.pop(future)
+                try:
+                    resized_img, x_offset, y_offset = future.result()
+                except Exception as e:
+                    print(f"\nWarning: Skipping '{img_path}' - cannot open image: {e}")
+                    continue
+                
+                # Fill the cell's letterbox bars in place, then paste the resized
+                # image at its centered spot; no intermediate cell image is built
+                if resized_img.size != (layout.cell_width, layout.cell_height):
+                    collage.paste(
+                        background_color,
+                        (x, y, x + layout.cell_width, y + layout.cell_height)
+                    )
+                collage.paste(resized_img, (x + x_offset, y + y_offset))
+        except BaseException:
+            # Leaving the with block waits for every queued cell; cancel the
+            # ones not started yet so Ctrl-C or an error stops promptly
+            for future in futures:
+                future.cancel()
+            raise
     
     # Complete the progress line
     sys.stdout.write("\n")
@@ -195,7 +240,7 @@ def grid_collage(images, collage, layout, background_color):
 
 def create_collage_canvas(image_files, layout, background_color,
                           title_text, title_margin, title_size, 
-                          title_font, title_border):
+                          title_font, title_border, workers=None):
     """
     Create the collage canvas and generate the grid collage.
     
@@ -208,12 +253,17 @@ def create_collage_canvas(image_files, layout, background_color,
         title_size: Font size for title
         title_font: Path to font file
         title_border: Border width for title
+        workers: Number of worker threads for rendering cells (None for CPU count)
     
     Returns:
         PIL.Image: The completed collage canvas
     """
+    # Parse the color string once; the canvas fill gets the RGB tuple
+    if isinstance(background_color, str):
+        background_color = ImageColor.getrgb(background_color)
+    
     # Setup canvas with optional title space
-    final_canvas, collage_canvas, title_offset = setup_canvas_with_title(
+    canvas, title_offset = setup_canvas_with_title(
         layout.canvas_width,
         layout.canvas_height,
         background_color,
@@ -224,14 +274,11 @@ def create_collage_canvas(image_files, layout, background_color,
         title_border=title_border
     )
     
+    # Place the grid below the reserved title space, if any, so it is
+    # rendered straight into the final canvas
+    if title_offset > 0:
+        layout = replace(layout, offset_y=layout.offset_y + title_offset)
+    
     # Create the grid collage
     print(f"Creating grid collage...")
-    collage_canvas = grid_collage(image_files, collage_canvas, layout, background_color)
-    
-    # If we reserved space, paste the collage onto the final canvas
-    if title_offset > 0:
-        final_canvas.paste(collage_canvas, (0, title_offset))
-        return final_canvas
-    else:
-        return collage_canvas
-
+    return grid_collage(image_files, canvas, layout, background_color, workers)
@@ -1,12 +1,21 @@
 """Text rendering and visual overlay utilities."""
 
+from functools import lru_cache
+
 from PIL import Image, ImageDraw, ImageFont
 
+# Shared draw context for measuring text; textbbox never touches its pixels
+_MEASURE_DRAW = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+
 
+@lru_cache(maxsize=32)
 def load_font(font_path, font_size):
     """
     Load a font for text rendering.
     
+    Results are cached per (font_path, font_size), so the title, the sample
+    label and the title space measurement share one parsed font.
+    
     Args:
         font_path: Path to TTF font file (None for default)
         font_size: Size of the font in pixels
@@ -43,10 +52,13 @@ def load_font(font_path, font_size):
         return ImageFont.load_default()
 
 
+@lru_cache(maxsize=32)
 def calculate_title_space(title, font_size, font_path, border_width):
     """
     Calculate the vertical space needed for the title.
     
+    Results are cached, as the measurement only depends on the arguments.
+    
     Args:
         title: Text to display
         font_size: Size of the font in pixels
@@ -58,12 +70,8 @@ def calculate_title_space(title, font_size, font_path, border_width):
     """
     font = load_font(font_path, font_size)
     
-    # Create a temporary draw object to measure text
-    temp_img = Image.new('RGB', (1, 1))
-    draw = ImageDraw.Draw(temp_img)
-    
     # Get bounding box of the text
-    bbox = draw.textbbox((0, 0), title, font=font)
+    bbox = _MEASURE_DRAW.textbbox((0, 0), title, font=font)
     text_height = bbox[3] - bbox[1]
     
     # Add padding (20px top + 20px bottom) and border space
@@ -78,6 +86,9 @@ def create_canvas_with_title_space(canvas_width, canvas_height, background_color
     """
     Create a canvas with extra space at the top for the title.
     
+    The collage grid is rendered directly into the canvas below the title
+    space, so no separate collage canvas is needed.
+    
     Args:
         canvas_width: Width of the main collage area
         canvas_height: Height of the main collage area
@@ -85,68 +96,80 @@ def create_canvas_with_title_space(canvas_width, canvas_height, background_color
         title_space_height: Extra height for title at the top
         
     Returns:
-        tuple: (full_canvas, collage_canvas, title_offset_y)
+        tuple: (full_canvas, title_offset_y)
     """
     # Create full canvas with extra space at top
     full_height = canvas_height + title_space_height
     full_canvas = Image.new("RGB", (canvas_width, full_height), background_color)
     
-    # Create a canvas for the collage part (without title space)
-    collage_canvas = Image.new("RGB", (canvas_width, canvas_height), background_color)
-    
-    return full_canvas, collage_canvas, title_space_height
+    return full_canvas, title_space_height
 
 
-def add_title_to_collage(image, title, font_size=48, font_path=None, text_color='#FFFFFF', 
-                         border_width=2, border_color='#000000', position='top-left'):
+def draw_text_with_border(image, text, font, text_color='#FFFFFF', border_width=2,
+                          border_color='#000000', position='top-left'):
     """
-    Add title text to the collage with a border.
+    Draw bordered text in a top corner of the image using a preloaded font.
     
     Args:
         image: PIL Image object
-        title: Text to display
-        font_size: Size of the font in pixels
-        font_path: Path to TTF font file (None for default)
+        text: Text to display
+        font: PIL ImageFont object, e.g. from load_font
         text_color: Color of the text in hex format
         border_width: Width of the text border/stroke
         border_color: Color of the border in hex format
         position: Text position - 'top-left' or 'top-right'
         
     Returns:
-        PIL Image object with title added
+        PIL Image object with text added
     """
     draw = ImageDraw.Draw(image)
-    font = load_font(font_path, font_size)
     
     # Calculate text position with padding from edges
     padding = 20
     
-    # Get text bounding box for width calculation
-    bbox = draw.textbbox((0, 0), title, font=font)
+    # Get text bounding box (including the stroke) for width calculation
+    bbox = draw.textbbox((0, 0), text, font=font, stroke_width=border_width)
     text_width = bbox[2] - bbox[0]
     
     # Calculate x position based on alignment
     if position == 'top-right':
-        x = image.width - text_width - padding - (2 * border_width)
+        x = image.width - text_width - padding
     else:  # top-left (default)
         x = padding
     
     y = padding
     
-    # Draw text with border (by drawing the text multiple times with offset)
-    if border_width > 0:
-        # Draw border by drawing text in all directions
-        for offset_x in range(-border_width, border_width + 1):
-            for offset_y in range(-border_width, border_width + 1):
-                if offset_x != 0 or offset_y != 0:
-                    draw.text((x + offset_x, y + offset_y), title, font=font, fill=border_color)
-    
-    # Draw the main text
-    draw.text((x, y), title, font=font, fill=text_color)
+    # Draw the text with its border in a single pass using Pillow's stroke
+    draw.text((x, y), text, font=font, fill=text_color,
+              stroke_width=border_width, stroke_fill=border_color)
     
     return image
 
 
+def add_title_to_collage(image, title, font_size=48, font_path=None, text_color='#FFFFFF', 
+                         border_width=2, border_color='#000000', position='top-left'):
+    """
+    Add title text to the collage with a border.
+    
+    Args:
+        image: PIL Image object
+        title: Text to display
+        font_size: Size of the font in pixels
+        font_path: Path to TTF font file (None for default)
+        text_color: Color of the text in hex format
+        border_width: Width of the text border/stroke
+        border_color: Color of the border in hex format
+        position: Text position - 'top-left' or 'top-right'
+        
+    Returns:
+        PIL Image object with title added
+    """
+    font = load_font(font_path, font_size)
+    return draw_text_with_border(
+        image, title, font, text_color, border_width, border_color, position
+    )
+
+
 def setup_canvas_with_title(canvas_width, canvas_height, background_color, 
                             title_text=None, title_margin=False, 
                             title_size=48, title_font=None, title_border=2):
@@ -164,7 +187,8 @@ def setup_canvas_with_title(canvas_width, canvas_height, background_color,
         title_border: Border width for title
         
     Returns:
-        tuple: (final_canvas, collage_canvas, title_offset)
+        tuple: (canvas, title_offset) where the collage grid starts
+        title_offset pixels from the top of canvas
     """
     title_space_height = 0
     
@@ -178,19 +202,17 @@ def setup_canvas_with_title(canvas_width, canvas_height, background_color,
         )
         print(f"Reserving {title_space_height}px space for title")
     
-    # Create canvas(es)
+    # Create canvas
     if title_space_height > 0:
         # Create canvas with extra space for title
-        final_canvas, collage_canvas, title_offset = create_canvas_with_title_space(
+        canvas, title_offset = create_canvas_with_title_space(
             canvas_width, canvas_height, background_color, title_space_height
         )
     else:
-        # Create single canvas
-        collage_canvas = Image.new("RGB", (canvas_width, canvas_height), background_color)
-        final_canvas = collage_canvas
+        canvas = Image.new("RGB", (canvas_width, canvas_height), background_color)
         title_offset = 0
     
-    return final_canvas, collage_canvas, title_offset
+    return canvas, title_offset
 
 
 def apply_title_to_collage(collage, title_text, title_size, title_font,